@@ -5,5 +5,6 @@ VIDEO_PATH_1 = "resources/videos/Task Video_Footfall Input_Computer Vision Engin
 # VIDEO_PATH_2 = ""
 
 LOG_FILE_PATH = 'storage/log.csv'
+EVENT_STORE_PATH = 'storage/events'
 
   
\ No newline at end of file
@@ -0,0 +1,280 @@
+import os
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import LOG_FILE_PATH, EVENT_STORE_PATH
+
+# Columns written by LogUpdater.write_to_csv, in file order
+CSV_COLUMNS = ['todays_date', 'current_time', 'frame_no', 'persons_trackid_in_out_time',
+               'daily_hours_per_person', 'total_individuals_detected', 'total_people_inside']
+
+# Columns whose value must stay the same for consecutive frames to share one interval
+VALUE_COLUMNS = ['logged_at', 'persons_trackid_in_out_time', 'daily_hours_per_person',
+                 'total_individuals_detected', 'total_people_inside']
+
+EVENT_COLUMNS = ['start_frame', 'end_frame', 'n_frames'] + VALUE_COLUMNS
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class _BoundedReader:
+    """
+    File-like wrapper that stops reading at a fixed byte offset, so a row that is
+    still being appended by the logger is left for the next compaction run.
+    """
+    def __init__(self, file, limit):
+        self.file = file
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class LogCompactor:
+    """
+    A class for compacting the per-frame CSV log into a run-length encoded event store.
+
+    Consecutive rows whose values do not change are collapsed into a single interval
+    (start_frame, end_frame), and the intervals are written as typed, compressed
+    Parquet part files next to a JSON manifest. The manifest records how far into the
+    CSV has been consumed, so later runs only read newly appended rows.
+
+    Methods:
+    --------
+    __init__(csv_file_path, store_path, chunksize=100000)
+        Initializes the compactor with the source CSV and the event store directory.
+    compact(rebuild=False)
+        Streams new CSV rows into the event store and returns the number of rows read.
+    read_events()
+        Returns all stored intervals as a single DataFrame.
+    """
+    def __init__(self, csv_file_path=LOG_FILE_PATH, store_path=EVENT_STORE_PATH, chunksize=100000) -> None:
+        self.csv_file_path = csv_file_path
+        self.store_path = store_path
+        self.chunksize = chunksize
+        self.manifest_path = os.path.join(store_path, MANIFEST_NAME)
+
+    def load_manifest(self):
+        """
+        Loads the store manifest, or returns an empty one if the store does not exist yet.
+
+        Returns:
+        --------
+        dict
+            Manifest with the consumed source offset, row count, part files and pending interval.
+        """
+        if not os.path.isfile(self.manifest_path):
+            return {'source_offset': 0, 'source_rows': 0, 'parts': [], 'pending': None}
+        with open(self.manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def _write_manifest(self, manifest):
+        # Write to a temporary file first so a crash never leaves a half-written manifest
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _rebuild(self):
+        manifest = self.load_manifest()
+        for part in manifest['parts']:
+            part_path = os.path.join(self.store_path, part)
+            if os.path.isfile(part_path):
+                os.remove(part_path)
+        if os.path.isfile(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def compact(self, rebuild=False):
+        """
+        Streams rows appended to the CSV since the last run into the event store.
+
+        Parameters:
+        -----------
+        rebuild : bool, optional
+            Discard the existing store and compact the whole CSV again (default is False).
+
+        Returns:
+        --------
+        int
+            Number of CSV rows read during this run.
+        """
+        if rebuild:
+            self._rebuild()
+        os.makedirs(self.store_path, exist_ok=True)
+        manifest = self.load_manifest()
+
+        file_size = os.path.getsize(self.csv_file_path)
+        if file_size < manifest['source_offset']:
+            raise ValueError(f"{self.csv_file_path} is smaller than the compacted offset; "
+                             "it was truncated or replaced, run again with rebuild=True.")
+
+        with open(self.csv_file_path, 'rb') as csv_file:
+            if manifest['source_offset'] == 0:
+                manifest['source_offset'] = self._skip_header(csv_file)
+            end_offset = self._last_complete_line_end(csv_file, manifest['source_offset'], file_size)
+            if end_offset <= manifest['source_offset']:
+                return 0
+
+            csv_file.seek(manifest['source_offset'])
+            reader = pd.read_csv(_BoundedReader(csv_file, end_offset - manifest['source_offset']),
+                                 header=None, names=CSV_COLUMNS, chunksize=self.chunksize,
+                                 dtype={'todays_date': str, 'current_time': str, 'frame_no': np.int32,
+                                        'persons_trackid_in_out_time': str, 'daily_hours_per_person': str,
+                                        'total_individuals_detected': np.int32, 'total_people_inside': np.int32})
+
+            pending = self._pending_from_manifest(manifest['pending'])
+            closed = []
+            rows_read = 0
+            for chunk in reader:
+                rows_read += len(chunk)
+                intervals = self._run_length_encode(self._to_typed(chunk))
+                intervals = self._merge_with_pending(intervals, pending)
+                closed.append(intervals.iloc[:-1])
+                pending = intervals.iloc[[-1]].reset_index(drop=True)
+
+        closed = [part for part in closed if len(part)]
+        if closed:
+            part_name = f"part-{len(manifest['parts']):05d}.parquet"
+            events = pd.concat(closed, ignore_index=True)
+            events.to_parquet(os.path.join(self.store_path, part_name), index=False, compression='zstd')
+            manifest['parts'].append(part_name)
+
+        manifest['source_offset'] = end_offset
+        manifest['source_rows'] += rows_read
+        manifest['pending'] = self._pending_to_manifest(pending)
+        self._write_manifest(manifest)
+        return rows_read
+
+    def read_events(self):
+        """
+        Reads every stored interval, including the still open trailing one.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            One row per interval with the columns in EVENT_COLUMNS.
+        """
+        manifest = self.load_manifest()
+        frames = [pd.read_parquet(os.path.join(self.store_path, part)) for part in manifest['parts']]
+        pending = self._pending_from_manifest(manifest['pending'])
+        if pending is not None:
+            frames.append(pending)
+        if not frames:
+            return self._cast_events(pd.DataFrame(columns=EVENT_COLUMNS))
+        return self._cast_events(pd.concat(frames, ignore_index=True))
+
+    @staticmethod
+    def _skip_header(csv_file):
+        header = csv_file.readline()
+        columns = header.decode().strip().split(',')
+        if columns != CSV_COLUMNS:
+            raise ValueError(f"Unexpected log header: {columns}")
+        return csv_file.tell()
+
+    @staticmethod
+    def _last_complete_line_end(csv_file, start_offset, file_size, block_size=65536):
+        # Scan backwards for the last newline so a partially written row is not consumed
+        position = file_size
+        while position > start_offset:
+            read_from = max(start_offset, position - block_size)
+            csv_file.seek(read_from)
+            block = csv_file.read(position - read_from)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                return read_from + newline + 1
+            position = read_from
+        return start_offset
+
+    @staticmethod
+    def _to_typed(chunk):
+        logged_at = pd.to_datetime(chunk['todays_date'] + ' ' + chunk['current_time'], format='%d-%m-%Y %H:%M:%S')
+        return pd.DataFrame({
+            'frame_no': chunk['frame_no'].to_numpy(),
+            'logged_at': logged_at.to_numpy(),
+            'persons_trackid_in_out_time': chunk['persons_trackid_in_out_time'].to_numpy(),
+            'daily_hours_per_person': chunk['daily_hours_per_person'].to_numpy(),
+            'total_individuals_detected': chunk['total_individuals_detected'].to_numpy(),
+            'total_people_inside': chunk['total_people_inside'].to_numpy(),
+        })
+
+    @staticmethod
+    def _run_length_encode(frame):
+        # A new interval starts when any value changes or the frame numbers are not consecutive
+        frame_no = frame['frame_no'].to_numpy()
+        changed = np.ones(len(frame), dtype=bool)
+        changed[1:] = frame_no[1:] != frame_no[:-1] + 1
+        for column in VALUE_COLUMNS:
+            values = frame[column].to_numpy()
+            changed[1:] |= values[1:] != values[:-1]
+
+        starts = np.flatnonzero(changed)
+        ends = np.append(starts[1:] - 1, len(frame) - 1)
+
+        intervals = frame.iloc[starts][VALUE_COLUMNS].reset_index(drop=True)
+        intervals.insert(0, 'start_frame', frame_no[starts])
+        intervals.insert(1, 'end_frame', frame_no[ends])
+        intervals.insert(2, 'n_frames', (ends - starts + 1).astype(np.int32))
+        return LogCompactor._cast_events(intervals)
+
+    @staticmethod
+    def _merge_with_pending(intervals, pending):
+        # Extend the open interval from the previous chunk/run if the new data continues it
+        if pending is None:
+            return intervals
+        first = intervals.iloc[0]
+        last = pending.iloc[0]
+        continues = first['start_frame'] == last['end_frame'] + 1 and all(
+            first[column] == last[column] for column in VALUE_COLUMNS)
+        if continues:
+            intervals.loc[0, 'start_frame'] = last['start_frame']
+            intervals.loc[0, 'n_frames'] += last['n_frames']
+            return intervals
+        return LogCompactor._cast_events(pd.concat([pending, intervals], ignore_index=True))
+
+    @staticmethod
+    def _cast_events(events):
+        return events.astype({
+            'start_frame': np.int32,
+            'end_frame': np.int32,
+            'n_frames': np.int32,
+            'logged_at': 'datetime64[ns]',
+            'persons_trackid_in_out_time': 'category',
+            'daily_hours_per_person': 'category',
+            'total_individuals_detected': np.int32,
+            'total_people_inside': np.int32,
+        })
+
+    @staticmethod
+    def _pending_to_manifest(pending):
+        if pending is None:
+            return None
+        record = pending.iloc[0].to_dict()
+        record['logged_at'] = record['logged_at'].isoformat()
+        return {column: value.item() if hasattr(value, 'item') else value for column, value in record.items()}
+
+    @staticmethod
+    def _pending_from_manifest(record):
+        if record is None:
+            return None
+        return LogCompactor._cast_events(pd.DataFrame([record], columns=EVENT_COLUMNS))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact the per-frame CSV log into a run-length encoded event store.')
+    parser.add_argument('--csv', default=LOG_FILE_PATH, help='Path to the CSV log written by LogUpdater.')
+    parser.add_argument('--store', default=EVENT_STORE_PATH, help='Directory of the compacted event store.')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Number of CSV rows read per chunk.')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the existing store and compact from scratch.')
+    args = parser.parse_args()
+
+    log_compactor = LogCompactor(args.csv, args.store, args.chunksize)
+    rows_read = log_compactor.compact(rebuild=args.rebuild)
+    events = log_compactor.read_events()
+    print(f'Compacted {rows_read} new rows; event store now holds {len(events)} intervals.')